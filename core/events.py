@@ -1,3 +1,4 @@
+import sys
 from dataclasses import dataclass, field
 from typing import Any, Optional, Dict
 
@@ -27,4 +28,8 @@ class GenericMessage:
     raw: Any = field(repr=False, default=None) 
     
     # 额外的数据字段，用于平台间的差异化信息
-    extra: Dict[str, Any] = field(default_factory=dict) 
\ No newline at end of file
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    def __post_init__(self):
+        # 平台名称统一为小写并驻留，比较时无需再做大小写转换
+        self.platform = sys.intern(self.platform.lower())
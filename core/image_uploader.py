@@ -4,11 +4,39 @@
 
 通过 Base64 编码将图片上传到 uapis.cn，获取公网可访问的URL
 """
-import base64
+import asyncio
 import httpx
+import orjson
 from pathlib import Path
 from typing import Optional, Dict, Any
 from utils.logger import bot_logger
+from utils.config import settings
+
+# 优先使用 SIMD 加速的 pybase64，未安装时回退到标准库
+try:
+    import pybase64 as base64
+except ImportError:
+    import base64
+
+# HTTP/2 需要可选依赖 h2，未安装时回退到 HTTP/1.1
+try:
+    import h2  # noqa: F401
+    _HTTP2_AVAILABLE = True
+except ImportError:
+    _HTTP2_AVAILABLE = False
+
+# 文件扩展名 -> MIME类型
+_MIME_TYPES: Dict[str, str] = {
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.gif': 'image/gif',
+    '.webp': 'image/webp',
+    '.bmp': 'image/bmp'
+}
+
+# multipart 上传接口返回这些状态码时，说明接口不支持该上传方式
+_MULTIPART_UNSUPPORTED_STATUS = frozenset({404, 405, 415})
 
 
 class ImageUploader:
@@ -17,14 +45,48 @@ class ImageUploader:
     # uapis.cn 图片上传API
     UPLOAD_API_URL = "https://uapis.cn/api/v1/image/frombase64"
     
-    def __init__(self, timeout: int = 30):
+    def __init__(self, timeout: int = 30, multipart_url: Optional[str] = None):
         """
         初始化图片上传服务
         
         Args:
             timeout: 请求超时时间（秒）
+            multipart_url: 支持 multipart/form-data 直传的上传地址（可选），
+                配置后优先直接上传原始字节，失败时回退到Base64方式
         """
         self.timeout = timeout
+        self.multipart_url = multipart_url or None
+        # 运行时确认 multipart 接口不可用后置为True，不影响配置的地址
+        self._multipart_disabled = False
+        # 长期复用的HTTP客户端，避免每次上传都重新建立TCP/TLS连接；
+        # 上传接口为单一主机，启用 HTTP/2 后并发上传可复用同一连接
+        self._client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_keepalive_connections=20,
+                max_connections=50,
+                keepalive_expiry=60.0
+            ),
+            http2=_HTTP2_AVAILABLE
+        )
+    
+    async def warmup(self, timeout: float = 5.0) -> None:
+        """
+        预先建立到上传接口的连接，避免首次上传时才进行TCP/TLS握手
+        
+        Args:
+            timeout: 预热请求的超时时间（秒），接口不可达时尽快放弃
+        """
+        try:
+            await self._client.head(self.UPLOAD_API_URL, timeout=timeout)
+            bot_logger.debug("图片上传连接预热完成")
+        except Exception as e:
+            bot_logger.warning(f"图片上传连接预热失败: {e}")
+    
+    async def aclose(self) -> None:
+        """关闭底层HTTP客户端"""
+        if not self._client.is_closed:
+            await self._client.aclose()
     
     async def upload_image_from_path(self, image_path: str | Path) -> Optional[str]:
         """
@@ -39,20 +101,21 @@ class ImageUploader:
         try:
             image_path = Path(image_path)
             
-            # 检查文件是否存在
-            if not image_path.exists():
+            # 检查文件是否存在（磁盘操作放到线程中执行，避免阻塞事件循环）
+            try:
+                file_stat = await asyncio.to_thread(image_path.stat)
+            except FileNotFoundError:
                 bot_logger.error(f"图片文件不存在: {image_path}")
                 return None
             
             # 检查文件大小（限制10MB）
-            file_size = image_path.stat().st_size
+            file_size = file_stat.st_size
             if file_size > 10 * 1024 * 1024:
                 bot_logger.error(f"图片文件过大: {file_size / 1024 / 1024:.2f}MB > 10MB")
                 return None
             
             # 读取图片文件
-            with open(image_path, 'rb') as f:
-                image_data = f.read()
+            image_data = await asyncio.to_thread(image_path.read_bytes)
             
             # 上传图片
             return await self.upload_image_from_bytes(image_data, image_path.suffix)
@@ -80,61 +143,108 @@ class ImageUploader:
             # 确定MIME类型
             mime_type = self._get_mime_type(file_extension)
             
-            # 转换为Base64
-            base64_data = base64.b64encode(image_bytes).decode('utf-8')
+            # 优先使用 multipart 直传原始字节，省去Base64编码及体积膨胀
+            if self.multipart_url and not self._multipart_disabled:
+                image_url = await self._upload_multipart(image_bytes, mime_type)
+                if image_url:
+                    return image_url
+                bot_logger.warning("multipart 上传失败，回退到Base64上传")
             
-            # 构造Data URI
-            data_uri = f"data:{mime_type};base64,{base64_data}"
+            # 构造请求体（Base64 Data URI）
+            payload = self._build_payload(image_bytes, mime_type)
             
             # 上传图片
-            return await self._upload_to_api(data_uri)
+            return await self._upload_to_api(payload)
             
         except Exception as e:
             bot_logger.error(f"从字节上传图片失败: {e}", exc_info=True)
             return None
     
-    async def _upload_to_api(self, data_uri: str) -> Optional[str]:
+    @staticmethod
+    def _build_payload(image_bytes: bytes, mime_type: str) -> bytes:
+        """
+        构造上传请求体 {"imageData": "data:<mime>;base64,<data>"}
+        
+        Base64 字符集与 MIME 类型均无需 JSON 转义，直接按字节拼接，
+        避免 decode 成 str 再由 json 重新编码产生的多份大内存拷贝
+        
+        Args:
+            image_bytes: 图片字节数据
+            mime_type: MIME类型
+            
+        Returns:
+            bytes: JSON 请求体
+        """
+        return b"".join((
+            b'{"imageData":"data:',
+            mime_type.encode('ascii'),
+            b';base64,',
+            base64.b64encode(image_bytes),
+            b'"}'
+        ))
+    
+    async def _upload_to_api(self, payload: bytes) -> Optional[str]:
         """
         调用API上传图片
         
         Args:
-            data_uri: Base64 Data URI
+            payload: JSON 请求体
+            
+        Returns:
+            str: 图片URL，失败返回None
+        """
+        response = await self._post(
+            self.UPLOAD_API_URL,
+            content=payload,
+            headers={"Content-Type": "application/json"}
+        )
+        if response is None:
+            return None
+        return self._parse_response(response)
+    
+    async def _upload_multipart(self, image_bytes: bytes, mime_type: str) -> Optional[str]:
+        """
+        以 multipart/form-data 方式直接上传原始图片字节
+        
+        Args:
+            image_bytes: 图片字节数据
+            mime_type: MIME类型
             
         Returns:
             str: 图片URL，失败返回None
         """
+        filename = f"image.{mime_type.rsplit('/', 1)[-1]}"
+        response = await self._post(
+            self.multipart_url,
+            files={"file": (filename, image_bytes, mime_type)}
+        )
+        if response is None:
+            return None
+        
+        # 接口不支持该上传方式时，后续请求直接使用Base64方式；
+        # 其他错误（如限流、请求体过大）只对本次上传回退
+        if response.status_code in _MULTIPART_UNSUPPORTED_STATUS:
+            bot_logger.warning(
+                f"multipart 上传接口不可用（HTTP {response.status_code}），已禁用"
+            )
+            self._multipart_disabled = True
+            return None
+        
+        return self._parse_response(response)
+    
+    async def _post(self, url: str, **kwargs: Any) -> Optional[httpx.Response]:
+        """
+        发送上传请求
+        
+        Args:
+            url: 上传地址
+            **kwargs: 传递给 httpx 的请求参数
+            
+        Returns:
+            httpx.Response: 响应对象，请求失败返回None
+        """
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    self.UPLOAD_API_URL,
-                    json={"imageData": data_uri}
-                )
-                
-                # 检查HTTP状态码
-                if response.status_code != 200:
-                    bot_logger.error(
-                        f"图片上传失败，HTTP状态码: {response.status_code}, "
-                        f"响应: {response.text}"
-                    )
-                    return None
-                
-                # 解析响应
-                result = response.json()
-                
-                # 检查业务状态码
-                if result.get('code') != 200:
-                    bot_logger.error(f"图片上传失败: {result.get('msg', '未知错误')}")
-                    return None
-                
-                # 获取图片URL
-                image_url = result.get('image_url')
-                if not image_url:
-                    bot_logger.error("响应中缺少图片URL")
-                    return None
-                
-                bot_logger.info(f"图片上传成功: {image_url}")
-                return image_url
-                
+            return await self._client.post(url, **kwargs)
         except httpx.TimeoutException:
             bot_logger.error(f"图片上传超时（{self.timeout}秒）")
             return None
@@ -145,6 +255,49 @@ class ImageUploader:
             bot_logger.error(f"图片上传异常: {e}", exc_info=True)
             return None
     
+    @staticmethod
+    def _parse_response(response: httpx.Response) -> Optional[str]:
+        """
+        解析上传接口的响应
+        
+        Args:
+            response: 响应对象
+            
+        Returns:
+            str: 图片URL，失败返回None
+        """
+        try:
+            raw = response.content
+            
+            # 检查HTTP状态码（只记录响应开头部分，避免完整解码大段内容）
+            if response.status_code != 200:
+                bot_logger.error(
+                    f"图片上传失败，HTTP状态码: {response.status_code}, "
+                    f"响应: {raw[:500].decode('utf-8', errors='replace')}"
+                )
+                return None
+            
+            # 解析响应
+            result = orjson.loads(raw)
+            
+            # 检查业务状态码
+            if result.get('code') != 200:
+                bot_logger.error(f"图片上传失败: {result.get('msg', '未知错误')}")
+                return None
+            
+            # 获取图片URL
+            image_url = result.get('image_url')
+            if not image_url:
+                bot_logger.error("响应中缺少图片URL")
+                return None
+            
+            bot_logger.info(f"图片上传成功: {image_url}")
+            return image_url
+            
+        except Exception as e:
+            bot_logger.error(f"图片上传异常: {e}", exc_info=True)
+            return None
+    
     @staticmethod
     def _get_mime_type(file_extension: str) -> str:
         """
@@ -156,17 +309,7 @@ class ImageUploader:
         Returns:
             str: MIME类型
         """
-        mime_types = {
-            '.png': 'image/png',
-            '.jpg': 'image/jpeg',
-            '.jpeg': 'image/jpeg',
-            '.gif': 'image/gif',
-            '.webp': 'image/webp',
-            '.bmp': 'image/bmp'
-        }
-        
-        extension = file_extension.lower()
-        return mime_types.get(extension, 'image/png')
+        return _MIME_TYPES.get(file_extension.lower(), 'image/png')
 
 
 # 全局单例
@@ -182,6 +325,17 @@ def get_image_uploader() -> ImageUploader:
     """
     global _image_uploader_instance
     if _image_uploader_instance is None:
-        _image_uploader_instance = ImageUploader()
+        _image_uploader_instance = ImageUploader(
+            multipart_url=settings.IMAGE_UPLOAD_MULTIPART_URL
+        )
     return _image_uploader_instance
 
+
+async def close_image_uploader() -> None:
+    """
+    关闭图片上传服务单例（释放连接池）
+    """
+    global _image_uploader_instance
+    if _image_uploader_instance is not None:
+        await _image_uploader_instance.aclose()
+        _image_uploader_instance = None
@@ -176,6 +176,16 @@ def on_regex(pattern: str):
         return func
     return decorator
 
+# 命令参数解析：命令名之后去除首尾空白的全部内容
+_COMMAND_ARGS_RE = re.compile(r'^\s*\S+\s+(\S.*?)\s*$', re.DOTALL)
+# 列表命令关键词（如 /map list）
+LIST_KEYWORDS = frozenset({'list', '列表', '全部'})
+
+def parse_command_args(content: str) -> Optional[str]:
+    """提取命令名之后的参数（已去除首尾空白），没有参数时返回None"""
+    match = _COMMAND_ARGS_RE.match(content)
+    return match.group(1) if match else None
+
 
 class Plugin(ABC):
     """插件基类"""
@@ -275,6 +285,8 @@ class Plugin(ABC):
         if command in self.commands:
             bot_logger.warning(f"插件 {self.name} 的命令 {command} 已被注册，可能覆盖先前设置。")
         self.commands[command] = {"description": description, "hidden": hidden}
+        if self._plugin_manager:
+            self._plugin_manager.invalidate_command_lines()
 
     async def subscribe(self, event_type: str, handler: Callable) -> None:
         if not inspect.iscoroutinefunction(handler):
@@ -637,6 +649,8 @@ class PluginManager:
         self._cleanup_done = False
         self.client = client
         self._loaded_plugin_classes = set()
+        # 预先格式化的帮助命令行，None 表示需要重新生成
+        self._formatted_command_lines: Optional[List[str]] = None
 
     async def register_plugin(self, plugin: Plugin) -> None:
         async with self._plugin_load_lock:
@@ -660,6 +674,7 @@ class PluginManager:
             register_plugin_instance(plugin)
             
             await plugin.on_load()
+            self.invalidate_command_lines()
             bot_logger.info(f"插件 {plugin.name} 已注册并加载")
             event = Event(type=EventType.PLUGIN_LOADED, data={"plugin": plugin.name})
             await self.dispatch_event(event)
@@ -682,6 +697,7 @@ class PluginManager:
                 plugin._set_plugin_manager(None)
                 await plugin.on_unload()
                 del self.plugins[plugin_name]
+                self.invalidate_command_lines()
                 bot_logger.info(f"插件 {plugin_name} 已注销并卸载")
                 event = Event(type=EventType.PLUGIN_UNLOADED, data={"plugin": plugin_name})
                 await self.dispatch_event(event)
@@ -761,6 +777,19 @@ class PluginManager:
                     if not info.get('hidden', False):
                         commands[cmd] = info
         return commands
+
+    def get_formatted_command_lines(self) -> List[str]:
+        """返回格式化好的命令列表行（"▎/命令 - 描述"），在命令变化前复用"""
+        if self._formatted_command_lines is None:
+            self._formatted_command_lines = [
+                f"▎/{cmd} - {info['description']}"
+                for cmd, info in self.get_command_list().items()
+            ]
+        return self._formatted_command_lines
+
+    def invalidate_command_lines(self) -> None:
+        """命令注册或注销后使格式化的命令列表失效"""
+        self._formatted_command_lines = None
             
     async def load_all(self) -> None:
         async with self._plugin_load_lock:
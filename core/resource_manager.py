@@ -2,11 +2,29 @@
 """
 资源管理器 - 加载和管理游戏资源索引
 """
+import bisect
+import mmap
+import os
+import sys
+import tempfile
+import time
 import orjson as json
 from pathlib import Path
-from typing import Dict, Optional, List, Any
+from typing import Dict, Optional, List, Any, Tuple
 from utils.logger import bot_logger
 
+# msgpack 为可选依赖，用于缓存解析后的资源索引以加快启动
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# 模糊匹配文本的分隔符（单元分隔符，不会出现在正常的名称中）
+_FUZZY_SEPARATOR = "\x1f"
+
+# 资源文件存在性检查结果的有效期（秒），过期后在查询时重新检查
+_EXISTENCE_TTL = 30.0
+
 
 class ResourceManager:
     """资源管理器类"""
@@ -29,6 +47,18 @@ class ResourceManager:
             "weapons": {},
             "arc": {}
         }
+        # 查询索引：规范化后的键/名称/别名 -> 资源键（精确匹配）
+        self._exact: Dict[str, Dict[str, str]] = {}
+        # 模糊匹配：所有规范化文本以分隔符拼接成的单个字符串，
+        # 以及每个资源在其中的起始偏移和对应的资源键
+        self._haystack: Dict[str, str] = {}
+        self._offsets: Dict[str, Tuple[List[int], List[str]]] = {}
+        # 资源信息缓存：资源键 -> 构建好的资源信息（含文件存在性）
+        self._info_cache: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        # 武器等级缓存：武器键 -> (排序后的等级列表, 等级 -> 等级信息)
+        self._weapon_levels: Dict[str, Tuple[List[int], Dict[int, Dict[str, Any]]]] = {}
+        # 文件路径 -> 上次检查存在性的时间（time.monotonic）
+        self._exists_checked: Dict[str, float] = {}
         self.load_resources()
     
     def load_resources(self) -> bool:
@@ -46,8 +76,7 @@ class ResourceManager:
                     bot_logger.warning(f"资源文件不存在: {file_path}")
                     continue
                 
-                with open(file_path, 'rb') as f:
-                    self.resources[category] = json.loads(f.read())
+                self.resources[category] = self._intern_strings(self._load_catalog(file_path))
                 
                 count = len(self.resources[category])
                 bot_logger.info(f"加载 {category} 资源: {count} 个")
@@ -55,11 +84,200 @@ class ResourceManager:
             except Exception as e:
                 bot_logger.error(f"加载 {category} 资源失败: {e}", exc_info=True)
                 success = False
+            
+            self._build_index(category)
+        
+        self._build_weapon_levels()
         
         total = sum(len(r) for r in self.resources.values())
         bot_logger.info(f"资源加载完成，共 {total} 个资源")
         return success
     
+    @staticmethod
+    def _load_catalog(file_path: Path) -> Dict:
+        """
+        读取资源索引文件
+        
+        安装了 msgpack 时，优先读取 .msgpack 缓存；缓存中记录了源 JSON 的
+        修改时间（纳秒）与大小，二者必须完全一致才会使用，否则解析 JSON
+        并重新写入缓存，供下次启动使用
+        
+        Args:
+            file_path: JSON 索引文件路径
+            
+        Returns:
+            Dict: 资源索引数据
+        """
+        cache_path = file_path.with_suffix('.msgpack')
+        source_stat = file_path.stat()
+        source_stamp = [source_stat.st_mtime_ns, source_stat.st_size]
+        
+        if msgpack is not None:
+            try:
+                with open(cache_path, 'rb') as f, \
+                        mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, \
+                        memoryview(mm) as view:
+                    cached = msgpack.unpackb(view, raw=False)
+                # 缓存格式: [源文件修改时间(ns), 源文件大小, 资源数据]
+                if isinstance(cached, list) and len(cached) == 3 and cached[:2] == source_stamp:
+                    return cached[2]
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                bot_logger.warning(f"读取资源缓存失败，改为解析JSON: {cache_path} ({e})")
+        
+        # 通过内存映射直接解析，避免额外复制一份文件内容
+        with open(file_path, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, \
+                memoryview(mm) as view:
+            data = json.loads(view)
+        
+        if msgpack is not None:
+            # 先写入临时文件再原子替换，避免中途崩溃留下不完整的缓存
+            tmp_path = None
+            try:
+                fd, tmp_path = tempfile.mkstemp(
+                    dir=cache_path.parent, prefix=cache_path.name, suffix='.tmp'
+                )
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(msgpack.packb([*source_stamp, data], use_bin_type=True))
+                os.replace(tmp_path, cache_path)
+            except OSError as e:
+                bot_logger.warning(f"写入资源缓存失败: {cache_path} ({e})")
+                if tmp_path is not None:
+                    try:
+                        os.unlink(tmp_path)
+                    except OSError:
+                        pass
+        
+        return data
+    
+    @classmethod
+    def _intern_strings(cls, data: Any) -> Any:
+        """
+        递归驻留资源数据中的所有字符串，使重复的键名、名称和别名共享同一对象
+        
+        Args:
+            data: 解析后的资源数据
+            
+        Returns:
+            Any: 字符串已驻留的资源数据
+        """
+        if isinstance(data, str):
+            return sys.intern(data)
+        if isinstance(data, dict):
+            return {sys.intern(k): cls._intern_strings(v) for k, v in data.items()}
+        if isinstance(data, list):
+            return [cls._intern_strings(v) for v in data]
+        return data
+    
+    @staticmethod
+    def _normalize(text: str) -> str:
+        """
+        规范化查询文本（大小写折叠并驻留）
+        
+        Args:
+            text: 原始文本
+            
+        Returns:
+            str: 规范化后的文本
+        """
+        return sys.intern(text.casefold())
+    
+    def _build_index(self, category: str) -> None:
+        """
+        构建指定类别的查询索引
+        
+        Args:
+            category: 资源类别
+        """
+        exact: Dict[str, str] = {}
+        parts: List[str] = []
+        starts: List[int] = []
+        keys: List[str] = []
+        position = 0
+        infos: Dict[str, Dict[str, Any]] = {}
+        
+        for key, resource in self.resources[category].items():
+            infos[key] = self._build_resource_info(category, key, resource)
+            
+            key_norm = self._normalize(key)
+            name_norm = self._normalize(resource.get('name', ''))
+            aliases_norm = tuple(self._normalize(alias) for alias in resource.get('aliases', []))
+            
+            starts.append(position)
+            keys.append(key)
+            
+            # 保持原有的优先级：先出现的资源优先
+            for token in (key_norm, name_norm, *aliases_norm):
+                exact.setdefault(token, key)
+                parts.append(token)
+                position += len(token) + 1
+        
+        self._exact[category] = exact
+        self._haystack[category] = _FUZZY_SEPARATOR.join(parts) + _FUZZY_SEPARATOR
+        self._offsets[category] = (starts, keys)
+        self._info_cache[category] = infos
+    
+    def _build_weapon_levels(self) -> None:
+        """
+        预计算每把武器的等级列表及各等级的图片信息
+        """
+        weapon_levels: Dict[str, Tuple[List[int], Dict[int, Dict[str, Any]]]] = {}
+        
+        for key, weapon_data in self.resources['weapons'].items():
+            levels_data = weapon_data.get('levels', {})
+            if not levels_data:
+                continue
+            
+            level_infos: Dict[int, Dict[str, Any]] = {}
+            for lv, level_info in levels_data.items():
+                try:
+                    level = int(lv)
+                except ValueError:
+                    bot_logger.warning(f"武器 {key} 的等级无效: {lv}")
+                    continue
+                
+                file_path = self.resource_dir / 'weapons' / level_info.get('filename', '')
+                level_infos[level] = {
+                    'filename': level_info.get('filename'),
+                    'file_path': str(file_path),
+                    'exists': self._check_exists(str(file_path))
+                }
+            weapon_levels[key] = (sorted(level_infos), level_infos)
+        
+        self._weapon_levels = weapon_levels
+    
+    def _check_exists(self, file_path: str) -> bool:
+        """
+        检查文件是否存在并记录检查时间
+        
+        Args:
+            file_path: 文件路径
+            
+        Returns:
+            bool: 文件是否存在
+        """
+        self._exists_checked[file_path] = time.monotonic()
+        return os.path.exists(file_path)
+    
+    def _refresh_exists(self, info: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        存在性检查结果过期时重新检查，使启动后新增或删除的资源文件能被及时感知
+        
+        Args:
+            info: 资源信息或武器等级信息
+            
+        Returns:
+            Dict: 同一个信息字典
+        """
+        file_path = info['file_path']
+        if file_path:
+            checked = self._exists_checked.get(file_path)
+            if checked is None or time.monotonic() - checked >= _EXISTENCE_TTL:
+                info['exists'] = self._check_exists(file_path)
+        return info
+    
     def reload_resources(self) -> bool:
         """
         重新加载资源索引
@@ -87,29 +305,24 @@ class ResourceManager:
         if category not in self.resources:
             return None
         
-        query_lower = query.lower().strip()
+        query_norm = query.strip().casefold()
+        infos = self._info_cache.get(category, {})
         
-        # 遍历该类别下的所有资源
-        for key, resource in self.resources[category].items():
-            # 精确匹配资源名称
-            if key.lower() == query_lower or resource.get('name', '').lower() == query_lower:
-                return self._build_resource_info(category, key, resource)
-            
-            # 匹配别名
-            aliases = resource.get('aliases', [])
-            if any(alias.lower() == query_lower for alias in aliases):
-                return self._build_resource_info(category, key, resource)
+        # 精确匹配资源键、名称或别名
+        key = self._exact.get(category, {}).get(query_norm)
+        if key is not None:
+            return self._refresh_exists(infos[key])
         
-        # 模糊匹配
-        for key, resource in self.resources[category].items():
-            if query_lower in key.lower() or query_lower in resource.get('name', '').lower():
-                return self._build_resource_info(category, key, resource)
-            
-            aliases = resource.get('aliases', [])
-            if any(query_lower in alias.lower() for alias in aliases):
-                return self._build_resource_info(category, key, resource)
+        # 模糊匹配：在拼接文本中查找首次出现的位置，再二分定位所属资源
+        if _FUZZY_SEPARATOR in query_norm:
+            return None
+        
+        starts, keys = self._offsets.get(category, ([], []))
+        index = self._haystack.get(category, "").find(query_norm)
+        if index < 0 or not keys:
+            return None
         
-        return None
+        return self._refresh_exists(infos[keys[bisect.bisect_right(starts, index) - 1]])
     
     def _build_resource_info(
         self, 
@@ -118,7 +331,7 @@ class ResourceManager:
         resource: Dict
     ) -> Dict[str, Any]:
         """
-        构建资源信息
+        构建资源信息（仅在加载时调用，结果缓存在 _info_cache 中）
         
         Args:
             category: 资源类别
@@ -144,7 +357,7 @@ class ResourceManager:
             'description': resource.get('description', ''),
             'type': resource.get('type', ''),
             'aliases': resource.get('aliases', []),
-            'exists': file_path.exists() if file_path else False
+            'exists': self._check_exists(str(file_path)) if file_path else False
         }
     
     def list_resources(self, category: str) -> List[Dict[str, Any]]:
@@ -160,11 +373,7 @@ class ResourceManager:
         if category not in self.resources:
             return []
         
-        result = []
-        for key, resource in self.resources[category].items():
-            result.append(self._build_resource_info(category, key, resource))
-        
-        return result
+        return list(self._info_cache.get(category, {}).values())
     
     def get_all_names(self, category: str) -> List[str]:
         """
@@ -201,14 +410,10 @@ class ResourceManager:
         if not weapon:
             return None
         
-        # 从原始数据中获取完整信息
-        weapon_key = weapon['key']
-        weapon_data = self.resources['weapons'].get(weapon_key, {})
-        
         # 检查是否有等级信息
-        levels_data = weapon_data.get('levels', {})
+        weapon_levels = self._weapon_levels.get(weapon['key'])
         
-        if not levels_data:
+        if not weapon_levels:
             # 没有等级信息，返回基础信息
             return {
                 'has_levels': False,
@@ -217,7 +422,7 @@ class ResourceManager:
             }
         
         # 有等级信息
-        levels_available = sorted([int(lv) for lv in levels_data.keys()])
+        levels_available, level_infos = weapon_levels
         
         if level is None:
             # 没有指定等级，返回所有等级信息
@@ -229,7 +434,7 @@ class ResourceManager:
             }
         
         # 检查指定的等级是否存在
-        if level not in levels_available:
+        if level not in level_infos:
             return {
                 'has_levels': True,
                 'weapon_data': weapon,
@@ -239,19 +444,12 @@ class ResourceManager:
             }
         
         # 返回指定等级的武器信息
-        level_info = levels_data.get(str(level), {})
-        file_path = self.resource_dir / 'weapons' / level_info.get('filename', '')
-        
         return {
             'has_levels': True,
             'weapon_data': weapon,
             'levels_available': levels_available,
             'selected_level': level,
-            'level_info': {
-                'filename': level_info.get('filename'),
-                'file_path': str(file_path) if file_path else None,
-                'exists': file_path.exists() if file_path else False
-            },
+            'level_info': self._refresh_exists(level_infos[level]),
             'need_level_selection': False
         }
 
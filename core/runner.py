@@ -117,6 +117,7 @@ async def _async_main() -> None:
 
     core_app = None
     platforms = []
+    warmup_task = None
     
     try:
         # 1. 初始化外部依赖
@@ -127,6 +128,13 @@ async def _async_main() -> None:
             await browser_manager.initialize()
         await image_manager.start()
         
+        # 预先加载资源索引并在后台预热图片上传连接，避免首个命令承担初始化开销；
+        # 预热不阻塞启动，上传接口不可达时不影响其他服务
+        from core.resource_manager import get_resource_manager
+        from core.image_uploader import get_image_uploader
+        get_resource_manager()
+        warmup_task = asyncio.create_task(get_image_uploader().warmup(), name="image_uploader_warmup")
+        
         # 初始化缓存系统
         from utils.cache_manager import api_cache_manager
         await api_cache_manager.start()
@@ -168,11 +176,20 @@ async def _async_main() -> None:
             bot_logger.info("缓存系统已停止")
         except Exception as e:
             bot_logger.error(f"停止缓存系统时发生错误: {e}")
-        
+
         if platforms:
             await asyncio.gather(*(p.stop() for p in platforms), return_exceptions=True)
         if core_app:
             await core_app.cleanup()
+
+        # 关闭图片上传客户端（须在平台停止之后，避免仍在处理的消息重新创建客户端）
+        if warmup_task and not warmup_task.done():
+            warmup_task.cancel()
+        try:
+            from core.image_uploader import close_image_uploader
+            await close_image_uploader()
+        except Exception as e:
+            bot_logger.error(f"关闭图片上传客户端时发生错误: {e}")
         
         await image_manager.stop()
 
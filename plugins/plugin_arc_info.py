@@ -14,7 +14,7 @@ project_root = os.path.dirname(current_dir)
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
-from core.plugin import Plugin, on_command
+from core.plugin import Plugin, on_command, parse_command_args, LIST_KEYWORDS
 from core.resource_manager import get_resource_manager
 from utils.message_handler import MessageHandler
 from utils.logger import bot_logger
@@ -48,15 +48,13 @@ class ARCInfoPlugin(Plugin):
         /arc list - 列出所有信息
         """
         # 提取查询参数
-        parts = content.split(maxsplit=1)
-        if len(parts) < 2:
+        query = parse_command_args(content)
+        if query is None:
             await self._send_usage(handler)
             return
         
-        query = parts[1].strip()
-        
         # 列表命令
-        if query.lower() in ['list', '列表', '全部']:
+        if query.lower() in LIST_KEYWORDS:
             await self._send_info_list(handler)
             return
         
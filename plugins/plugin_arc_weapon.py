@@ -16,7 +16,7 @@ if project_root not in sys.path:
 
 from typing import Optional, Dict, Any
 from pathlib import Path
-from core.plugin import Plugin, on_command
+from core.plugin import Plugin, on_command, parse_command_args, LIST_KEYWORDS
 from core.resource_manager import get_resource_manager
 from utils.message_handler import MessageHandler
 from utils.logger import bot_logger
@@ -54,15 +54,13 @@ class ARCWeaponPlugin(Plugin):
         /weapon 示例武器 2   - 查看武器2级详情
         """
         # 提取查询参数
-        parts = content.split(maxsplit=1)
-        if len(parts) < 2:
+        query = parse_command_args(content)
+        if query is None:
             await self._send_usage(handler)
             return
         
-        query = parts[1].strip()
-        
         # 列表命令
-        if query.lower() in ['list', '列表', '全部']:
+        if query.lower() in LIST_KEYWORDS:
             await self._send_weapon_list(handler)
             return
         
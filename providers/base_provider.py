@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import Awaitable, Callable
 
 class IMessageStrategy(ABC):
     """
@@ -24,6 +25,21 @@ class IMessageStrategy(ABC):
         """发送图片消息"""
         raise NotImplementedError
 
+    @abstractmethod
+    async def send_image_url(
+        self,
+        image_url: str,
+        fallback_bytes_getter: Callable[[], Awaitable[bytes]]
+    ) -> bool:
+        """
+        发送已上传的图片
+        
+        Args:
+            image_url: 图片公网URL
+            fallback_bytes_getter: 不支持URL发送的场景下，用于获取图片原始字节
+        """
+        raise NotImplementedError
+
     @abstractmethod
     async def recall(self) -> bool:
         """撤回消息"""
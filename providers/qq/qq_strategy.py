@@ -1,3 +1,4 @@
+from typing import Awaitable, Callable
 from botpy.message import GroupMessage, Message
 from providers.base_provider import IMessageStrategy
 from core.events import GenericMessage
@@ -77,6 +78,28 @@ class QQStrategy(IMessageStrategy):
         except Exception as e:
             return False
 
+    async def send_image_url(
+        self,
+        image_url: str,
+        fallback_bytes_getter: Callable[[], Awaitable[bytes]]
+    ) -> bool:
+        """发送已上传的图片（群聊/频道使用URL，私聊使用原始字节）"""
+        if isinstance(self.raw_message, GroupMessage):
+            return await self._api.send_to_group(
+                group_id=self.raw_message.group_openid, content="", msg_type=MessageType.MEDIA,
+                msg_id=self.raw_message.id, image_url=image_url
+            )
+        elif hasattr(self.raw_message, "channel_id") and self.raw_message.channel_id:
+            return await self._api.send_to_channel(
+                channel_id=self.raw_message.channel_id, content="",
+                msg_id=self.raw_message.id, image_url=image_url
+            )
+        else: # 私聊
+            return await self._api.send_to_user(
+                user_id=self.user_id, content="", msg_type=MessageType.MEDIA,
+                msg_id=self.raw_message.id, file_image=await fallback_bytes_getter()
+            )
+
     async def recall(self) -> bool:
         """撤回消息"""
         try:
@@ -74,6 +74,7 @@ class Settings:
     IMAGE_STORAGE_PATH = _config.get("image", {}).get("storage", {}).get("path", "static/temp_images")
     IMAGE_LIFETIME = _config.get("image", {}).get("storage", {}).get("lifetime", 24)
     IMAGE_CLEANUP_INTERVAL = _config.get("image", {}).get("storage", {}).get("cleanup_interval", 1)
+    IMAGE_UPLOAD_MULTIPART_URL = _config.get("image", {}).get("upload", {}).get("multipart_url", "")  # 为空则只使用Base64上传
     
     # Redis 配置
     REDIS_HOST = _config.get("redis", {}).get("host", "127.0.0.1")
@@ -176,6 +177,9 @@ class Settings:
                 "path": self.IMAGE_STORAGE_PATH,
                 "lifetime": self.IMAGE_LIFETIME,
                 "cleanup_interval": self.IMAGE_CLEANUP_INTERVAL
+            },
+            "upload": {
+                "multipart_url": self.IMAGE_UPLOAD_MULTIPART_URL
             }
         })
 
@@ -1,15 +1,96 @@
+import asyncio
 import base64
+import os
+import time
+import aiofiles
 from botpy.message import GroupMessage, Message
 from utils.logger import bot_logger
 from utils.config import Settings
 from utils.image_manager import ImageManager
 from PIL import Image
 import io
-from typing import Optional
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
 
 # 动态选择提供商
 from utils.provider_manager import get_provider_manager
 from core.events import GenericMessage
+from core.image_uploader import get_image_uploader
+
+# 图片文件头签名
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+_JPEG_SIGNATURE = b'\xff\xd8\xff'
+
+# 转码时使用 PNG 的最大像素数，超过则使用 JPEG
+_PNG_MAX_PIXELS = 256 * 256
+
+# 同一会话文本消息发送失败后，在该时间（秒）内不再发送图片错误提示
+_ERROR_NOTICE_COOLDOWN = 2.0
+# 记录的会话数超过该值时清理已过冷却期的记录
+_TEXT_FAIL_TRACK_SIZE = 1024
+
+# 已上传图片URL缓存的有效期（秒）与最大条目数
+_UPLOAD_CACHE_TTL = 3600
+_UPLOAD_CACHE_SIZE = 256
+
+async def _read_file(path: str) -> bytes:
+    """异步读取文件内容"""
+    async with aiofiles.open(path, 'rb') as f:
+        return await f.read()
+
+
+class _UploadCoalescer:
+    """
+    图片上传合并器。
+    同一文件的并发上传请求共享同一次上传，并限制同时进行的上传数量；
+    已上传的文件按 (路径, 修改时间, 大小) 缓存URL，有效期内直接复用。
+    """
+
+    def __init__(self, max_concurrency: int = 8):
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._cache: OrderedDict[Tuple[str, int, int], Tuple[str, float]] = OrderedDict()
+
+    async def submit(self, image_path: str) -> Optional[str]:
+        """提交上传请求，返回图片URL，失败返回None"""
+        try:
+            stat = await asyncio.to_thread(os.stat, image_path)
+            cache_key = (image_path, stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            cache_key = None
+
+        if cache_key is not None:
+            cached = self._cache.get(cache_key)
+            if cached and time.monotonic() - cached[1] < _UPLOAD_CACHE_TTL:
+                self._cache.move_to_end(cache_key)
+                return cached[0]
+
+        future = self._inflight.get(image_path)
+        if future is None:
+            future = asyncio.ensure_future(self._upload(image_path, cache_key))
+            self._inflight[image_path] = future
+            future.add_done_callback(lambda _: self._inflight.pop(image_path, None))
+        # shield: 单个调用方被取消时不影响其他等待同一上传的调用方
+        return await asyncio.shield(future)
+
+    def evict(self, image_url: str) -> None:
+        """移除指向该URL的缓存条目（发送失败时调用，避免重复使用已失效的URL）"""
+        for key in [key for key, (url, _) in self._cache.items() if url == image_url]:
+            del self._cache[key]
+
+    async def _upload(self, image_path: str, cache_key: Optional[Tuple[str, int, int]]) -> Optional[str]:
+        async with self._semaphore:
+            image_url = await get_image_uploader().upload_image_from_path(image_path)
+
+        if image_url and cache_key is not None:
+            self._cache[cache_key] = (image_url, time.monotonic())
+            self._cache.move_to_end(cache_key)
+            while len(self._cache) > _UPLOAD_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return image_url
+
+
+_upload_coalescer = _UploadCoalescer()
 
 class MessageHandler:
     """
@@ -18,12 +99,19 @@ class MessageHandler:
     并将所有操作（如发送消息、撤回）委托给该策略。
     """
     
+    # 缓存的 ProviderManager 单例，避免每条消息都重新获取
+    _provider_manager = None
+    # 各会话最近一次文本消息发送失败的时间（time.monotonic）
+    _text_fail_ts: Dict[Tuple[str, str], float] = {}
+
     def __init__(self, message: GenericMessage):
         self.message = message
         
         # 1. 通过管理器获取当前消息的提供商
-        provider_manager = get_provider_manager()
-        bot_logger.debug(f"[MessageHandler] 获取到 ProviderManager 实例, ID: {id(provider_manager)}")
+        provider_manager = MessageHandler._provider_manager
+        if provider_manager is None:
+            provider_manager = MessageHandler._provider_manager = get_provider_manager()
+            bot_logger.debug("[MessageHandler] 获取到 ProviderManager 实例, ID: {}", id(provider_manager))
         provider = provider_manager.get_provider(message)
         
         if not provider:
@@ -36,8 +124,13 @@ class MessageHandler:
         self.strategy = provider.get_message_strategy(message)
 
     def is_platform(self, platform_name: str) -> bool:
-        """判断消息是否来自指定的平台"""
-        return self.message.platform.lower() == platform_name.lower()
+        """判断消息是否来自指定的平台（platform_name 需为小写，如 "qq"）"""
+        return self.message.platform == platform_name
+
+    def _conversation_key(self) -> Tuple[str, str]:
+        """当前消息所属会话的标识：频道 > 群 > 私聊用户"""
+        message = self.message
+        return (message.platform, message.channel_id or message.guild_id or message.author.id)
 
     @property
     def user_id(self) -> str:
@@ -46,18 +139,42 @@ class MessageHandler:
             return ""
         return self.strategy.user_id
 
+    @staticmethod
+    def _is_supported_format(image_data: bytes) -> bool:
+        """通过文件头判断图片是否已是 PNG/JPEG"""
+        return image_data[:8] == _PNG_SIGNATURE or image_data[:3] == _JPEG_SIGNATURE
+
     @staticmethod
     def ensure_image_format(image_data: bytes) -> bytes:
         """确保图片格式正确"""
+        # 快速路径：文件头已是 PNG/JPEG 时无需解码
+        if MessageHandler._is_supported_format(image_data):
+            return image_data
+        return MessageHandler._reencode_image(image_data)
+
+    @staticmethod
+    def _reencode_image(image_data: bytes) -> bytes:
+        """
+        将其他格式的图片转码为 PNG/JPEG（CPU 密集，异步场景下应放到线程中执行）。
+        小图使用低压缩级别的 PNG，大图使用编码更快的 JPEG。
+        """
         try:
             img = Image.open(io.BytesIO(image_data))
             if img.format not in ['PNG', 'JPEG']:
                 output = io.BytesIO()
+                if img.mode == 'P' and 'transparency' in img.info:
+                    img = img.convert('RGBA')
                 if img.mode in ('RGBA', 'LA'):
                     background = Image.new('RGB', img.size, (255, 255, 255))
                     background.paste(img, mask=img.split()[-1])
                     img = background
-                img.save(output, format='PNG')
+                if img.width * img.height <= _PNG_MAX_PIXELS:
+                    # 图片会由CDN重新托管，用少量体积换取更低的编码开销
+                    img.save(output, format='PNG', compress_level=1, optimize=False)
+                else:
+                    if img.mode != 'RGB':
+                        img = img.convert('RGB')
+                    img.save(output, format='JPEG', quality=85, progressive=False)
                 return output.getvalue()
             return image_data
         except Exception as e:
@@ -69,22 +186,42 @@ class MessageHandler:
         if not self.strategy:
             return False
         try:
-            return await self.strategy.send_text(content)
+            result = await self.strategy.send_text(content)
         except Exception as e:
             bot_logger.error(f"发送消息时发生未知错误: {str(e)}", exc_info=True)
-            return False
+            result = False
+        if not result:
+            fail_ts = MessageHandler._text_fail_ts
+            now = time.monotonic()
+            if len(fail_ts) >= _TEXT_FAIL_TRACK_SIZE:
+                for key in [key for key, ts in fail_ts.items() if now - ts >= _ERROR_NOTICE_COOLDOWN]:
+                    del fail_ts[key]
+            fail_ts[self._conversation_key()] = now
+        return result
+
+    async def _send_image_error_notice(self) -> None:
+        """发送图片失败时的文本提示；同一会话的文本发送刚失败过时跳过，避免在故障期间重复请求"""
+        last_fail = MessageHandler._text_fail_ts.get(self._conversation_key())
+        if last_fail is not None and time.monotonic() - last_fail < _ERROR_NOTICE_COOLDOWN:
+            bot_logger.debug("当前会话最近的文本消息发送失败，跳过图片错误提示")
+            return
+        await self.send_text(f"\n⚠️ 发送图片时发生错误")
 
     async def send_image(self, image_data: bytes) -> bool:
         """发送图片消息 (委托给策略)"""
         if not self.strategy:
             return False
         try:
-            processed_data = self.ensure_image_format(image_data)
+            if self._is_supported_format(image_data):
+                processed_data = image_data
+            else:
+                # 转码放到线程中执行，避免阻塞事件循环
+                processed_data = await asyncio.to_thread(self._reencode_image, image_data)
             return await self.strategy.send_image(processed_data)
         except Exception as e:
             bot_logger.error(f"发送图片时发生未知错误: {str(e)}", exc_info=True)
             # 尝试用文本发送错误信息
-            await self.send_text(f"\n⚠️ 发送图片时发生错误")
+            await self._send_image_error_notice()
             return False
     
     async def send_image_from_path(self, image_path: str) -> bool:
@@ -100,21 +237,10 @@ class MessageHandler:
         if not self.strategy:
             return False
         
+        image_url = None
         try:
-            from pathlib import Path
-            from core.image_uploader import get_image_uploader
-            from core.constants import MessageType
-            from botpy.message import GroupMessage
-            
-            # 读取图片文件
-            image_path_obj = Path(image_path)
-            if not image_path_obj.exists():
-                bot_logger.error(f"图片文件不存在: {image_path}")
-                return False
-            
-            # 上传到第三方API获取URL
-            uploader = get_image_uploader()
-            image_url = await uploader.upload_image_from_path(image_path)
+            # 上传到第三方API获取URL（文件不存在时由上传服务记录并返回None）
+            image_url = await _upload_coalescer.submit(image_path)
             
             if not image_url:
                 bot_logger.error(f"图片上传失败: {image_path}")
@@ -122,44 +248,17 @@ class MessageHandler:
             
             bot_logger.info(f"图片上传成功，URL: {image_url}")
             
-            # 根据消息类型发送图片
-            raw_message = self.message.raw if hasattr(self.message, 'raw') else None
-            
-            if not raw_message:
-                bot_logger.error("无法获取原始消息对象")
-                return False
-            
-            if isinstance(raw_message, GroupMessage):
-                # 群聊消息 - 使用image_url
-                return await self.strategy._api.send_to_group(
-                    group_id=raw_message.group_openid,
-                    content="",
-                    msg_type=MessageType.MEDIA,
-                    msg_id=raw_message.id,
-                    image_url=image_url
-                )
-            elif hasattr(raw_message, "channel_id") and raw_message.channel_id:
-                # 频道消息 - 使用image_url
-                return await self.strategy._api.send_to_channel(
-                    channel_id=raw_message.channel_id,
-                    content="",
-                    msg_id=raw_message.id,
-                    image_url=image_url
-                )
-            else:
-                # 私聊 - 使用file_image (bytes)
-                image_bytes = image_path_obj.read_bytes()
-                return await self.strategy._api.send_to_user(
-                    user_id=self.user_id,
-                    content="",
-                    msg_type=MessageType.MEDIA,
-                    msg_id=raw_message.id,
-                    file_image=image_bytes
-                )
+            # 由策略根据消息场景发送图片（私聊需要原始字节时再读取文件）
+            sent = await self.strategy.send_image_url(image_url, lambda: _read_file(image_path))
+            if not sent:
+                _upload_coalescer.evict(image_url)
+            return sent
             
         except Exception as e:
             bot_logger.error(f"发送图片失败: {e}", exc_info=True)
-            await self.send_text(f"\n⚠️ 发送图片时发生错误")
+            if image_url:
+                _upload_coalescer.evict(image_url)
+            await self._send_image_error_notice()
             return False
             
     async def recall(self) -> bool: